@@ -0,0 +1,54 @@
+"""Persistent exact-match cache for LLM responses."""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def cache_key(*parts: object) -> str:
+    """Return a stable hex digest identifying a request made of *parts*."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store, safe to share between processes."""
+
+    def __init__(self, path: Path, ttl: float = 0):
+        self.path = path
+        self.ttl = ttl
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use so importing the package never touches disk."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires REAL)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for *key*, or None on a miss or expired entry."""
+        row = self._connect().execute(
+            "SELECT response, expires FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, expires = row
+        if expires is not None and expires < time.time():
+            return None
+        return response
+
+    def set(self, key: str, response: str):
+        """Store *response* under *key*, expiring after ``ttl`` seconds if set."""
+        expires = time.time() + self.ttl if self.ttl > 0 else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses (key, response, expires) VALUES (?, ?, ?)",
+            (key, response, expires),
+        )
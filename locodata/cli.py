@@ -6,7 +6,6 @@ from typing import List
 from .config import REPO_PATH
 from .design_processor import DesignProcessor
 from .codeqa_processor import BaseQAProcessor, CodeQADatasetProcessor, LocalRepoQAProcessor
-from . import utils
 
 app = typer.Typer(add_help_option=True)
 
@@ -15,8 +14,8 @@ app = typer.Typer(add_help_option=True)
 def scan():
     """Index repository and report basic stats."""
     builder = DesignProcessor(REPO_PATH)
-    files = list(builder.iter_code_chunks())
-    print(f"Files: {len(list(utils.walk_code_files(REPO_PATH)))} | Chunks: {len(files)}")
+    chunks = sum(1 for _ in builder.iter_code_chunks())
+    print(f"Files: {len(builder.files)} | Chunks: {chunks}")
 
 
 @app.command()
@@ -39,8 +38,8 @@ def answer_codeqa_dataset(
         return
     
     processor = CodeQADatasetProcessor(path)
-    results = processor.process_qa(limit)
-    print(f"Processed {len(results)} examples from {path}")
+    count = processor.process_qa(limit)
+    print(f"Processed {count} examples from {path}")
 
 
 @app.command()
@@ -49,8 +48,8 @@ def generate_qa(
 ):
     """Generate both questions and answers for local repository code chunks."""
     processor = LocalRepoQAProcessor(REPO_PATH)
-    results = processor.process_qa(limit)
-    print(f"Processed {len(results)} code chunks from {REPO_PATH}")
+    count = processor.process_qa(limit)
+    print(f"Processed {count} code chunks from {REPO_PATH}")
 
 
 @app.command()
@@ -0,0 +1,153 @@
+"""Spread chat completions over several OpenAI-compatible endpoints."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import httpx  # noqa: I900
+except ImportError:  # pragma: no cover
+    httpx = None
+
+RETRYABLE_STATUS = 429  # plus any 5xx
+MAX_RETRIES = 4       # extra rounds over all endpoints after the first one fails
+BACKOFF_BASE = 1.0    # seconds before the first retry round, doubled each round
+BACKOFF_MAX = 60.0    # cap on any single wait, including a server's Retry-After
+
+
+def _retry_after(response) -> Optional[float]:
+    """Seconds to wait according to *response*'s ``Retry-After`` header, if it has a usable one."""
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Endpoint:
+    """One OpenAI-compatible endpoint with its own connection pool and concurrency cap."""
+
+    def __init__(self, base_url: str, api_key: str, model: str, concurrency: int):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.model = model
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def _bind(self):
+        """Create the client and semaphore for the running event loop on first use."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._client is not None:
+            return
+        options = dict(
+            timeout=60,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        try:
+            self._client = httpx.AsyncClient(http2=True, **options)
+        except ImportError:  # h2 not installed; connection pooling still applies
+            self._client = httpx.AsyncClient(**options)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._loop = loop
+
+    async def aclose(self):
+        """Close the client; the next request on any loop opens a fresh one."""
+        if self._client is not None:
+            client, self._client, self._loop = self._client, None, None
+            await client.aclose()
+
+    async def post_chat(self, payload: Dict) -> str:
+        """POST one chat completion and return its text."""
+        self._bind()
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                response = await self._client.post(
+                    f"{self.base_url}/chat/completions",
+                    json={"model": self.model, **payload},
+                )
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"].strip()
+        finally:
+            self.in_flight -= 1
+
+
+class LLMClientPool:
+    """Send each request to the least-loaded endpoint, failing over and backing off on 429/5xx."""
+
+    def __init__(self, endpoints: List[Endpoint]):
+        if not endpoints:
+            raise ValueError("LLMClientPool needs at least one endpoint")
+        if httpx is None:
+            raise RuntimeError("httpx package not installed. Run `pip install httpx`.")
+        self.endpoints = endpoints
+        self._next = 0
+
+    @classmethod
+    def from_config(cls, specs: List[Dict], base_url: str, api_key: str, model: str, concurrency: int) -> "LLMClientPool":
+        """Build a pool from ``LLM_ENDPOINTS`` specs, or a single default endpoint if there are none."""
+        if not specs:
+            specs = [{"base_url": base_url}]
+        return cls([
+            Endpoint(
+                base_url=spec["base_url"],
+                api_key=spec.get("api_key", api_key),
+                model=spec.get("model", model),
+                concurrency=int(spec.get("concurrency", concurrency)),
+            )
+            for spec in specs
+        ])
+
+    async def aclose(self):
+        """Close every endpoint's client, e.g. before the event loop that opened them ends."""
+        await asyncio.gather(*(e.aclose() for e in self.endpoints))
+
+    def _candidates(self) -> List[Endpoint]:
+        """Endpoints ordered by in-flight requests; ties rotate round-robin."""
+        rotated = self.endpoints[self._next:] + self.endpoints[:self._next]
+        self._next = (self._next + 1) % len(self.endpoints)
+        return sorted(rotated, key=lambda e: e.in_flight)
+
+    async def complete(self, payload: Dict) -> Tuple[str, str]:
+        """Complete *payload* on the best endpoint, trying the others if it is throttled or down.
+
+        When every endpoint fails, the round is retried up to ``MAX_RETRIES``
+        times with exponential backoff, waiting at least as long as any
+        ``Retry-After`` the endpoints sent. Returns the response text and the
+        model of the endpoint that produced it.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            last_error = None
+            wait = None
+            for endpoint in self._candidates():
+                try:
+                    return await endpoint.post_chat(payload), endpoint.model
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if status != RETRYABLE_STATUS and status < 500:
+                        raise
+                    last_error = e
+                    retry_after = _retry_after(e.response)
+                    if retry_after is not None:
+                        wait = max(wait or 0.0, retry_after)
+                except httpx.TransportError as e:
+                    last_error = e
+            if attempt == MAX_RETRIES:
+                break
+            # Jitter spreads out the requests that were throttled together
+            backoff = BACKOFF_BASE * 2 ** attempt * random.uniform(0.5, 1.0)
+            await asyncio.sleep(min(BACKOFF_MAX, max(backoff, wait or 0.0)))
+        raise last_error
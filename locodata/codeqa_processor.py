@@ -1,13 +1,43 @@
 """CodeQA dataset processor for generating answers given code and questions."""
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Iterator
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, List, Iterator, Optional, Set, Tuple, TypeVar
 from tqdm import tqdm
 
 from . import llm, utils
-from .config import ARTIFACTS_DIR, SYSTEM_GENERATE_PROMPT, SYSTEM_ANSWER_PROMPT
+from .config import ARTIFACTS_DIR, LLM_CONCURRENCY, SYSTEM_GENERATE_PROMPT, SYSTEM_ANSWER_PROMPT
+
+# Prompt framing, joined around each request's fields instead of f-string formatted
+_CODE_PREFIX = "CODE:\n```\n"
+_CODE_SUFFIX = "\n```\n"
+_QUESTION = "QUESTION: "
+_FILE_LANG = "FILE_LANG: "
+_START_LINE = "\nSTART_LINE: "
+_END_LINE = "\nEND_LINE: "
+_END = "\n"
+
+T = TypeVar("T")
+
+
+def _answer_payload(code: str, question: str) -> str:
+    """Build the user prompt asking for an answer to *question* about *code*."""
+    return "".join((_CODE_PREFIX, code, _CODE_SUFFIX, _QUESTION, question, _END))
+
+
+def _generate_payload(data: Dict) -> str:
+    """Build the user prompt asking for a question and answer about a repository chunk."""
+    return "".join((
+        _CODE_PREFIX, data["code"], _CODE_SUFFIX,
+        _FILE_LANG, data["file_lang"],
+        _START_LINE, str(data["start_line"]),
+        _END_LINE, str(data["end_line"]), _END,
+    ))
 
 
 class BaseQAProcessor:
@@ -18,9 +48,9 @@ class BaseQAProcessor:
     def process_qa(self, code: str, question: str) -> Dict:
         """Process a single code-question pair."""
         try:
-            payload = f"CODE:\n```\n{code}\n```\nQUESTION: {question}\n"
-            raw = llm.llm_completion(payload, SYSTEM_ANSWER_PROMPT)
-            raw = json.loads(raw)
+            payload = _answer_payload(code, question)
+            raw = llm.llm_completion(payload, SYSTEM_ANSWER_PROMPT, semantic=(code, question))
+            raw = utils.json_loads(raw)
             
             result = {
                 "code": code,
@@ -41,26 +71,155 @@ class BaseQAProcessor:
                 "error": str(e)
             }
 
+    async def _process_one(self, code: str, question: str) -> Dict:
+        """Answer a single code-question pair and return the generated fields."""
+        try:
+            payload = _answer_payload(code, question)
+            raw = await llm.llm_completion_async(payload, SYSTEM_ANSWER_PROMPT, semantic=(code, question))
+            raw = utils.json_loads(raw)
+            return {
+                "generated_answer": raw.get("answer"),
+                "reasoning": raw.get("reasoning")
+            }
+        except Exception as e:
+            return {
+                "generated_answer": None,
+                "reasoning": None,
+                "error": str(e)
+            }
+
+    async def _iter_bounded(self, items: Iterable[T], run: Callable[[T], Awaitable[Dict]], desc: str, unit: str,
+                            total: Optional[int] = None) -> AsyncIterator[Tuple[T, Dict]]:
+        """Run *run* on each of *items* with at most ``LLM_CONCURRENCY`` in flight, yielding ``(item, result)`` as each finishes.
+
+        Items are pulled from the iterable only when a slot frees up, so at most
+        ``LLM_CONCURRENCY`` items and tasks are alive at any time.
+        """
+        source = iter(items)
+        pending: Dict[asyncio.Task, T] = {}
+        with tqdm(total=total, desc=desc, unit=unit) as progress:
+            try:
+                while True:
+                    for item in islice(source, LLM_CONCURRENCY - len(pending)):
+                        pending[asyncio.ensure_future(run(item))] = item
+                    if not pending:
+                        return
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        progress.update()
+                        yield pending.pop(task), task.result()
+            finally:
+                # The consumer stopped early; don't leave requests running
+                for task in pending:
+                    task.cancel()
+
+    async def process_qa_batch(self, pairs: List[Tuple[str, str]]) -> List[Dict]:
+        """Process code-question pairs concurrently, returning results in input order."""
+        results: List[Dict] = [None] * len(pairs)
+        
+        try:
+            async for (i, (code, question)), generated in self._iter_bounded(
+                    enumerate(pairs), lambda item: self._process_one(*item[1]),
+                    desc="Processing questions for selected code", unit="question", total=len(pairs)):
+                results[i] = {
+                    "code": code,
+                    "question": question,
+                    "mode": "single_qa",
+                    **generated
+                }
+        finally:
+            # The HTTP clients belong to this batch's event loop
+            await llm.aclose()
+        
+        return results
+
     def process_multiple_qa(self, code: str, questions: List[str]) -> List[Dict]:
         """Process code with multiple user-provided questions."""
-        results = []
+        results = asyncio.run(self.process_qa_batch([(code, question) for question in questions]))
         
-        for i, question in enumerate(tqdm(questions, desc=f"Processing questions for selected code", unit="question")):
-            result = self.process_qa(code, question)
+        for i, result in enumerate(results):
             result["question_index"] = i + 1
-            results.append(result)
             
         return results
 
-    def save_results(self, results: List[Dict], output_file: Path):
-        """Save results to JSON file."""
+    def save_results(self, results: Iterable[Dict], output_file: Path):
+        """Save results to JSON file, serializing one result at a time."""
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
+        # Frame the array by hand so neither the list nor its JSON text is held in full
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+            separator = "[\n"
+            for result in results:
+                f.write(separator)
+                f.write(utils.json_dumps(result, indent=True))
+                separator = ",\n"
+            f.write("\n]\n" if separator == ",\n" else "[]\n")
         
         print(f"Results saved to {output_file}")
 
+    def load_checkpoint(self, path: Path, key: Callable[[Dict], Hashable]) -> Set[Hashable]:
+        """Return the keys of results successfully written to the JSONL file at *path*.
+
+        Records carrying an ``"error"`` are left out, so a rerun retries them.
+        """
+        done = set()
+        if not path.exists():
+            return done
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = utils.json_loads(line)
+                    if "error" not in record:
+                        done.add(key(record))
+                except (json.JSONDecodeError, KeyError):
+                    # Blank or torn line left behind by an interrupted run
+                    continue
+        return done
+
+    def save_results_jsonl(self, results: Iterable[Dict], output_file: Path) -> int:
+        """Append *results* to a JSONL file as they arrive, flushing every line.
+
+        Returns the number of results written.
+        """
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Terminate a torn last line so the next record starts on its own line
+        torn = False
+        if output_file.exists() and output_file.stat().st_size > 0:
+            with open(output_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        
+        count = 0
+        with open(output_file, 'a', encoding='utf-8') as f:
+            if torn:
+                f.write("\n")
+            for result in results:
+                f.write(utils.json_dumps(result) + "\n")
+                f.flush()
+                count += 1
+        
+        print(f"Results saved to {output_file}")
+        return count
+
+    @staticmethod
+    def _iter_blocking(results: AsyncIterator[Dict]) -> Iterator[Dict]:
+        """Drive an async result stream on a private event loop, yielding to synchronous code."""
+        async def _next() -> Dict:
+            return await results.__anext__()
+        
+        with asyncio.Runner() as runner:
+            try:
+                while True:
+                    try:
+                        yield runner.run(_next())
+                    except StopAsyncIteration:
+                        return
+            finally:
+                # The HTTP clients belong to this runner's event loop
+                runner.run(llm.aclose())
+
 
 class CodeQADatasetProcessor(BaseQAProcessor):
     """Process CodeQA dataset and generate answers for code-question pairs."""
@@ -69,8 +228,8 @@ class CodeQADatasetProcessor(BaseQAProcessor):
         super().__init__()
         self.data_dir = data_dir
             
-    def iter_codeqa_data(self) -> Iterator[Dict]:
-        """Iterate through CodeQA data files."""
+    def iter_codeqa_data(self, limit: int = None) -> Iterator[Dict]:
+        """Iterate through CodeQA data files, reading at most *limit* rows."""
         
         # Extract split name from the directory path
         split_name = self.data_dir.name
@@ -82,13 +241,16 @@ class CodeQADatasetProcessor(BaseQAProcessor):
         if not all(f.exists() for f in [code_file, question_file, answer_file]):
             raise FileNotFoundError(f"Required files not found in {self.data_dir}")
         
-        with open(code_file, 'r', encoding='utf-8') as cf, \
-             open(question_file, 'r', encoding='utf-8') as qf, \
-             open(answer_file, 'r', encoding='utf-8') as af:
+        with open(code_file, 'r', encoding='utf-8', buffering=1 << 20) as cf, \
+             open(question_file, 'r', encoding='utf-8', buffering=1 << 20) as qf, \
+             open(answer_file, 'r', encoding='utf-8', buffering=1 << 20) as af:
+            
+            # Bound the read itself so rows past the limit are never decoded
+            rows = zip(cf, qf, af)
+            if limit:
+                rows = islice(rows, limit)
             
-            for line_num, (code_line, question_line, answer_line) in enumerate(
-                zip(cf, qf, af), 1
-            ):
+            for line_num, (code_line, question_line, answer_line) in enumerate(rows, 1):
                 yield {
                     "line_num": line_num,
                     "code": code_line.strip(),
@@ -99,49 +261,34 @@ class CodeQADatasetProcessor(BaseQAProcessor):
                     "mode": "codeqa_data"
                 }
 
-    def process_qa(self, limit: int):
-        """Process code-question pairs from CodeQA dataset."""
-        
-        results = []
-        
-        for i, data in enumerate(tqdm(self.iter_codeqa_data(), 
-                                    desc=f"Generating answers for CodeQA dataset {self.data_dir}", 
-                                    unit="pair")):
-            if limit and i >= limit:
-                break
-                
-            try:
-                # For CodeQA data, we have both code and question
-                payload = f"CODE:\n```\n{data['code']}\n```\nQUESTION: {data['question']}\n"
-                raw = llm.llm_completion(payload, SYSTEM_ANSWER_PROMPT)
-                raw = json.loads(raw)
-            
-                # Combine original data with generated answer
-                result = {
-                    **data,
-                    "generated_answer": raw.get("answer"),
-                    "reasoning": raw.get("reasoning")
-                }
-                results.append(result)
-                
-            except Exception as e:
-                print(f"Error processing item {i+1}: {e}")
-                # Add error info to results
-                result = {
-                    **data,
-                    "generated_answer": None,
-                    "reasoning": None,
-                    "error": str(e)
-                }
-                results.append(result)
-        
+    async def _process_items(self, items: Iterable[Dict]) -> AsyncIterator[Dict]:
+        """Generate answers for dataset rows concurrently, yielding each as it completes."""
+        # For CodeQA data, we have both code and question
+        async for data, generated in self._iter_bounded(items, lambda data: self._process_one(data["code"], data["question"]),
+                                                        desc=f"Generating answers for CodeQA dataset {self.data_dir}",
+                                                        unit="pair"):
+            if "error" in generated:
+                print(f"Error processing item {data['line_num']}: {generated['error']}")
+            # Combine original data with generated answer
+            yield {**data, **generated}
+
+    def iter_results(self, limit: int, skip: Set[int] = frozenset()) -> Iterator[Dict]:
+        """Yield answered rows in completion order, leaving out line numbers in *skip*."""
+        items = (data for data in self.iter_codeqa_data(limit) if data["line_num"] not in skip)
+        return self._iter_blocking(self._process_items(items))
+
+    def process_qa(self, limit: int) -> int:
+        """Process code-question pairs from CodeQA dataset, resuming from earlier output.
+
+        Returns the number of pairs processed in this run.
+        """
         # Save results with appropriate naming
         split_name = self.data_dir.name
         language = self.data_dir.parent.name
-        output_file = ARTIFACTS_DIR / f"codeqa_{language}_{split_name}_results.json"
-        self.save_results(results, output_file)
+        output_file = ARTIFACTS_DIR / f"codeqa_{language}_{split_name}_results.jsonl"
         
-        return results
+        done = self.load_checkpoint(output_file, key=lambda r: r["line_num"])
+        return self.save_results_jsonl(self.iter_results(limit, skip=done), output_file)
 
 
 class LocalRepoQAProcessor(BaseQAProcessor):
@@ -152,60 +299,67 @@ class LocalRepoQAProcessor(BaseQAProcessor):
             
     def iter_code_chunks(self) -> Iterator[dict]:
         """Iterate through code chunks from local repository files."""
-        for file in utils.walk_code_files(self.repo_path):
-            code = file.read_text(errors="ignore")
-            chunks = utils.chunk_code(code)
+        reads = utils.prefetch_files(utils.walk_code_files(self.repo_path),
+                                     partial(utils.read_source, errors="ignore"))
+        for file, content in reads:
+            code = content.result()
+            chunks = utils.chunk_code_with_lines(code)
             file_lang = utils.detect_file_language(file)
-            for idx, chunk in enumerate(chunks):
+            for idx, (chunk, start_line, end_line) in enumerate(chunks):
                 yield {
                     "code": chunk,
                     "file_path": str(file),
+                    "chunk_index": idx,
                     "file_lang": file_lang,
-                    "start_line": idx * (utils.CHUNK_SIZE - utils.OVERLAP) + 1,
-                    "end_line": idx * (utils.CHUNK_SIZE - utils.OVERLAP) + len(chunk.splitlines()),
+                    "start_line": start_line,
+                    "end_line": end_line,
                     "mode": "local_repo"
                 }
 
-    def process_qa(self, limit: int):
-        """Process local repository code chunks and generate both questions and answers."""
-        
-        results = []
-        
-        for i, data in enumerate(tqdm(self.iter_code_chunks(), 
-                                    desc=f"Generating Q&A for local repo {self.repo_path}", 
-                                    unit="chunk")):
-            if limit and i >= limit:
-                break
-                
-            try:
-                # For local repo, we need to generate both question and answer
-                payload = f"CODE:\n```\n{data['code']}\n```\nFILE_LANG: {data['file_lang']}\nSTART_LINE: {data['start_line']}\nEND_LINE: {data['end_line']}\n"
-                raw = llm.llm_completion(payload, SYSTEM_GENERATE_PROMPT)
-                raw = json.loads(raw)
-            
-                # Combine original data with generated answer
-                result = {
-                    **data,
-                    "generated_answer": raw.get("answer"),
-                    "generated_question": raw.get("question"),
-                    "reasoning": raw.get("reasoning")
-                }
-                results.append(result)
-                
-            except Exception as e:
-                print(f"Error processing item {i+1}: {e}")
-                # Add error info to results
-                result = {
-                    **data,
-                    "generated_answer": None,
-                    "generated_question": None,
-                    "reasoning": None,
-                    "error": str(e)
-                }
-                results.append(result)
-        
+    async def _generate_one(self, data: Dict) -> Dict:
+        """Generate a question and answer for a single code chunk."""
+        try:
+            # For local repo, we need to generate both question and answer
+            payload = _generate_payload(data)
+            raw = await llm.llm_completion_async(payload, SYSTEM_GENERATE_PROMPT)
+            raw = utils.json_loads(raw)
+            return {
+                "generated_answer": raw.get("answer"),
+                "generated_question": raw.get("question"),
+                "reasoning": raw.get("reasoning")
+            }
+        except Exception as e:
+            return {
+                "generated_answer": None,
+                "generated_question": None,
+                "reasoning": None,
+                "error": str(e)
+            }
+
+    async def _process_items(self, items: Iterable[Dict]) -> AsyncIterator[Dict]:
+        """Generate Q&A for code chunks concurrently, yielding each as it completes."""
+        async for data, generated in self._iter_bounded(items, self._generate_one,
+                                                        desc=f"Generating Q&A for local repo {self.repo_path}",
+                                                        unit="chunk"):
+            if "error" in generated:
+                print(f"Error processing {data['file_path']} chunk {data['chunk_index']}: {generated['error']}")
+            # Combine original data with generated answer
+            yield {**data, **generated}
+
+    def iter_results(self, limit: int, skip: Set[Tuple[str, int]] = frozenset()) -> Iterator[Dict]:
+        """Yield generated Q&A in completion order, leaving out (file_path, chunk_index) keys in *skip*."""
+        items = (data for data in islice(self.iter_code_chunks(), limit or None)
+                 if (data["file_path"], data["chunk_index"]) not in skip)
+        return self._iter_blocking(self._process_items(items))
+
+    def process_qa(self, limit: int) -> int:
+        """Process local repository code chunks and generate both questions and answers.
+
+        Chunks already present in the output from an earlier run are skipped.
+        Returns the number of chunks processed in this run.
+        """
         # Save results with appropriate naming
-        output_file = ARTIFACTS_DIR / f"local_repo_qa_results.json"
-        self.save_results(results, output_file)
+        output_file = ARTIFACTS_DIR / f"local_repo_qa_results.jsonl"
         
-        return results
+        done = self.load_checkpoint(output_file, key=lambda r: (r["file_path"], r["chunk_index"]))
+        return self.save_results_jsonl(self.iter_results(limit, skip=done), output_file)
@@ -5,15 +5,31 @@ import os
 # Base paths -----------------------------------------------------
 PROJECT_ROOT: Path = Path(os.getenv("PROJECT_ROOT", Path.cwd()))
 REPO_PATH: Path = PROJECT_ROOT / os.getenv("REPO_PATH", "locodata")
-ARTIFACTS_DIR: Path = PROJECT_ROOT / "artifacts"
-ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+ARTIFACTS_DIR: Path = PROJECT_ROOT / "artifacts"  # created by whichever writer needs it first
 
 # Model + provider params ---------------------------------------
 LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "qwen")
 MODEL_NAME: str = os.getenv("LLM_MODEL", "qwen-turbo")
 MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", 4096))
 TEMPERATURE: float = float(os.getenv("LLM_TEMP", 0.2))
+LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", 16))
+# Optional JSON list of extra endpoints, e.g.
+# [{"base_url": "...", "api_key": "...", "model": "...", "concurrency": 50}]
+# Kept as raw text; parsed by llm when the endpoint pool is first needed
+LLM_ENDPOINTS: str = os.getenv("LLM_ENDPOINTS", "")
     
+# Response cache ------------------------------------------------
+LLM_CACHE_PATH: Path = ARTIFACTS_DIR / "llm_cache.sqlite"
+LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", 0))  # seconds, 0 = never expire
+LLM_CACHE_DISABLE: bool = os.getenv("LLM_CACHE_DISABLE", "0").lower() in ("1", "true", "yes")
+LLM_SEM_CACHE: bool = os.getenv("LLM_SEM_CACHE", "0").lower() in ("1", "true", "yes")
+LLM_SEM_CACHE_PATH: Path = ARTIFACTS_DIR / "sem_cache.faiss"
+LLM_SEM_THRESHOLD: float = float(os.getenv("LLM_SEM_THRESHOLD", 0.95))
+
+# Chunking ------------------------------------------------------
+# Drop comments and extra blank lines before chunking design inputs
+STRIP_COMMENTS: bool = os.getenv("STRIP_COMMENTS", "0").lower() in ("1", "true", "yes")
+
 # System language -----------------------------------------------
 SYSTEM_LANG: str = os.getenv("SYSTEM_LANG", "cn")
 
@@ -1,11 +1,69 @@
 """Pipeline orchestrator that ties everything together."""
 from __future__ import annotations
 
-import json
+import os
+import re
 from pathlib import Path
+from typing import Dict, Iterable, List, Set
 
 from . import llm, utils
-from .config import ARTIFACTS_DIR, SYSTEM_DESIGN_PROMPT
+from .config import ARTIFACTS_DIR, STRIP_COMMENTS, SYSTEM_DESIGN_PROMPT
+
+# Directories never worth describing in the structure overview
+SKIP_DIRS = frozenset({'__pycache__', 'node_modules', '.git', '.venv', 'venv'})
+
+FRAMEWORK_INDICATORS = {
+    'Django': ['django', 'manage.py'],
+    'Flask': ['flask', 'app.py'],
+    'FastAPI': ['fastapi', 'uvicorn'],
+    'Express': ['express', 'package.json'],
+    'React': ['react', 'jsx', 'tsx'],
+    'Vue': ['vue'],
+    'Spring': ['spring', 'pom.xml'],
+    'Rails': ['rails', 'Gemfile'],
+    'Laravel': ['laravel', 'artisan'],
+}
+
+DB_INDICATORS = {
+    'SQLite': ['.db', '.sqlite'],
+    'PostgreSQL': ['postgres', 'psycopg2'],
+    'MySQL': ['mysql', 'pymysql'],
+    'MongoDB': ['mongo', 'pymongo'],
+    'Redis': ['redis'],
+}
+
+
+class _IndicatorMatcher:
+    """Find which names have an indicator substring in any path, scanning each path once."""
+
+    def __init__(self, indicators: Dict[str, List[str]]):
+        self._names = list(indicators)
+        owners: Dict[str, Set[str]] = {}
+        for name, words in indicators.items():
+            for word in words:
+                owners.setdefault(word, set()).add(name)
+        self._implied = {
+            word: set().union(*(owners[w] for w in owners if word.startswith(w)))
+            for word in owners
+        }
+        # A lookahead reports overlapping hits ('mongo' within 'pymongo'); where
+        # the longest indicator wins, _implied credits the ones it starts with
+        alternation = '|'.join(re.escape(w) for w in sorted(owners, key=len, reverse=True))
+        self._pattern = re.compile(f"(?=({alternation}))")
+
+    def detect(self, paths: Iterable[str]) -> List[str]:
+        """Return the detected names in declaration order."""
+        found: Set[str] = set()
+        for path in paths:
+            for match in self._pattern.finditer(path):
+                found |= self._implied[match.group(1)]
+            if len(found) == len(self._names):
+                break
+        return [name for name in self._names if name in found]
+
+
+_FRAMEWORK_MATCHER = _IndicatorMatcher(FRAMEWORK_INDICATORS)
+_DB_MATCHER = _IndicatorMatcher(DB_INDICATORS)
 
 
 class DesignProcessor:
@@ -13,11 +71,20 @@ class DesignProcessor:
 
     def __init__(self, repo_path: Path):
         self.repo_path = repo_path
-        ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+        # Walk the tree once; overview and stack detection all reuse these
+        self._files = list(utils.walk_code_files(self.repo_path))
+        self._file_strs_lower = [str(f).lower() for f in self._files]
+        self._lang_of = {f: utils.detect_file_language(f) for f in self._files}
+
+    @property
+    def files(self) -> List[Path]:
+        """Code files found under the repository when the processor was created."""
+        return self._files
 
     def build_design(self, requirement: str):
         design = self.generate_design(requirement)
-        (ARTIFACTS_DIR / "design.json").write_text(json.dumps(design, indent=2), encoding="utf-8")
+        ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+        (ARTIFACTS_DIR / "design.json").write_text(utils.json_dumps(design, indent=True), encoding="utf-8")
         return design
 
     def repository_overview(self) -> str:
@@ -28,8 +95,8 @@ class DesignProcessor:
         total_files = 0
         file_sizes = []
         
-        for file in utils.walk_code_files(self.repo_path):
-            lang = utils.detect_file_language(file)
+        for file in self._files:
+            lang = self._lang_of[file]
             language_counts[lang] = language_counts.get(lang, 0) + 1
             total_files += 1
             try:
@@ -83,31 +150,30 @@ class DesignProcessor:
         def add_directory_contents(path: Path, indent: int = 2):
             """Recursively add directory contents to structure."""
             try:
-                items = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name.lower()))
-                for item in items:
-                    # Skip hidden files and directories
-                    if item.name.startswith('.'):
-                        continue
-                    
-                    # Skip __pycache__ and other cache directories
-                    if item.name in ['__pycache__', 'node_modules', '.git', '.venv', 'venv']:
+                # DirEntry caches the file type from readdir, so sorting and
+                # is_dir() below need no extra stat() calls
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda e: (e.is_file(follow_symlinks=False), e.name.lower()))
+                for entry in entries:
+                    # Skip hidden files and directories, __pycache__ and other cache directories
+                    if entry.name.startswith('.') or entry.name in SKIP_DIRS:
                         continue
                     
                     prefix = "  " * indent
-                    if item.is_dir():
-                        structure_lines.append(f"{prefix}📁 {item.name}/")
-                        add_directory_contents(item, indent + 1)
+                    if entry.is_dir(follow_symlinks=False):
+                        structure_lines.append(f"{prefix}📁 {entry.name}/")
+                        add_directory_contents(Path(entry.path), indent + 1)
                     else:
                         # Get file extension for better categorization
-                        ext = item.suffix.lower()
+                        ext = os.path.splitext(entry.name)[1].lower()
                         if ext in ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', '.rb', '.go', '.rs']:
-                            structure_lines.append(f"{prefix}📄 {item.name}")
+                            structure_lines.append(f"{prefix}📄 {entry.name}")
                         elif ext in ['.json', '.yaml', '.yml', '.toml', '.ini', '.cfg']:
-                            structure_lines.append(f"{prefix}⚙️  {item.name}")
+                            structure_lines.append(f"{prefix}⚙️  {entry.name}")
                         elif ext in ['.md', '.txt', '.rst']:
-                            structure_lines.append(f"{prefix}📝 {item.name}")
+                            structure_lines.append(f"{prefix}📝 {entry.name}")
                         else:
-                            structure_lines.append(f"{prefix}📄 {item.name}")
+                            structure_lines.append(f"{prefix}📄 {entry.name}")
             except PermissionError:
                 structure_lines.append(f"{'  ' * indent}❌ Permission denied")
             except Exception as e:
@@ -128,46 +194,14 @@ class DesignProcessor:
         stack_info = []
         
         # Check for framework indicators
-        framework_indicators = {
-            'Django': ['django', 'manage.py'],
-            'Flask': ['flask', 'app.py'],
-            'FastAPI': ['fastapi', 'uvicorn'],
-            'Express': ['express', 'package.json'],
-            'React': ['react', 'jsx', 'tsx'],
-            'Vue': ['vue'],
-            'Spring': ['spring', 'pom.xml'],
-            'Rails': ['rails', 'Gemfile'],
-            'Laravel': ['laravel', 'artisan'],
-        }
-        
-        detected_frameworks = []
-        for framework, indicators in framework_indicators.items():
-            for indicator in indicators:
-                if any(indicator in str(f).lower() for f in utils.walk_code_files(self.repo_path)):
-                    detected_frameworks.append(framework)
-                    break
-        
+        detected_frameworks = _FRAMEWORK_MATCHER.detect(self._file_strs_lower)
         if detected_frameworks:
-            stack_info.append(f"  Frameworks: {', '.join(set(detected_frameworks))}")
+            stack_info.append(f"  Frameworks: {', '.join(detected_frameworks)}")
         
         # Check for database indicators
-        db_indicators = {
-            'SQLite': ['.db', '.sqlite'],
-            'PostgreSQL': ['postgres', 'psycopg2'],
-            'MySQL': ['mysql', 'pymysql'],
-            'MongoDB': ['mongo', 'pymongo'],
-            'Redis': ['redis'],
-        }
-        
-        detected_dbs = []
-        for db, indicators in db_indicators.items():
-            for indicator in indicators:
-                if any(indicator in str(f).lower() for f in utils.walk_code_files(self.repo_path)):
-                    detected_dbs.append(db)
-                    break
-        
+        detected_dbs = _DB_MATCHER.detect(self._file_strs_lower)
         if detected_dbs:
-            stack_info.append(f"  Databases: {', '.join(set(detected_dbs))}")
+            stack_info.append(f"  Databases: {', '.join(detected_dbs)}")
         
         return '\n'.join(stack_info) if stack_info else "  Standard technology stack"
 
@@ -179,25 +213,22 @@ class DesignProcessor:
         )
         raw = llm.llm_completion(prompt, SYSTEM_DESIGN_PROMPT)
         # add the repo overview to the design
-        design = json.loads(raw)
+        design = utils.json_loads(raw)
         design['requirement'] = requirement
         design["repo_overview"] = overview
         return design
 
     def iter_code_chunks(self):
-        """Iterate through code chunks in the repository."""
-        for file_path in utils.walk_code_files(self.repo_path):
-            try:
-                code = file_path.read_text(encoding='utf-8')
-                chunks = utils.chunk_code(code)
-                for i, chunk in enumerate(chunks):
-                    yield {
-                        'file_path': str(file_path),
-                        'chunk_index': i,
-                        'code': chunk,
-                        'language': utils.detect_file_language(file_path)
-                    }
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-                continue
+        """Iterate through code chunks in the repository, chunking files in worker processes."""
+        for file_path, chunks in utils.chunk_repo_parallel(self.repo_path, files=self._files,
+                                                           strip_comments=STRIP_COMMENTS):
+            file_str = str(file_path)
+            language = self._lang_of[file_path]
+            for i, chunk in enumerate(chunks):
+                yield {
+                    'file_path': file_str,
+                    'chunk_index': i,
+                    'code': chunk,
+                    'language': language
+                }
 
@@ -1,30 +1,208 @@
 """LLM‑powered Q&A generation for code chunks."""
 from __future__ import annotations
 
-from .config import MODEL_NAME, TEMPERATURE, API_KEY, LLM_PROVIDER
-
-try:
-    import openai  # noqa: I900
-    openai.api_key = API_KEY
-    openai.base_url = None
-    if LLM_PROVIDER == "qwen":
-        openai.base_url = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1/"
-    elif LLM_PROVIDER == "openai":
-        openai.base_url = "https://api.openai.com/v1"
-    
-except ImportError:  # pragma: no cover
-    openai = None
-
-
-def llm_completion(prompt: str, system_prompt: str) -> str:
+import asyncio
+import functools
+import inspect
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache import ResponseCache, cache_key
+from .utils import json_loads
+from .config import (
+    MODEL_NAME, TEMPERATURE, API_KEY, LLM_PROVIDER, LLM_CONCURRENCY, LLM_ENDPOINTS,
+    LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_DISABLE,
+    LLM_SEM_CACHE, LLM_SEM_CACHE_PATH, LLM_SEM_THRESHOLD,
+)
+
+# OpenAI-compatible endpoint of the configured provider
+_BASE_URL = {
+    "qwen": "https://dashscope-intl.aliyuncs.com/compatible-mode/v1/",
+    "openai": "https://api.openai.com/v1",
+}.get(LLM_PROVIDER, "https://api.openai.com/v1")
+
+# Provider SDKs and HTTP clients are imported on first use, and the embedding
+# stack only when the semantic cache is enabled, so commands that never reach
+# an LLM (--help, scan) start quickly.
+_client = None
+_pool = None
+_cache = ResponseCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL)
+_semantic_cache = None
+if LLM_SEM_CACHE:
+    from .semantic_cache import SemanticCache
+    _semantic_cache = SemanticCache(LLM_SEM_CACHE_PATH, threshold=LLM_SEM_THRESHOLD)
+
+
+@functools.lru_cache(maxsize=None)
+def _endpoint_specs() -> Tuple[Dict, ...]:
+    """Parse the ``LLM_ENDPOINTS`` setting, raising ValueError naming it if it is malformed."""
+    if not LLM_ENDPOINTS.strip():
+        return ()
+    try:
+        specs = json.loads(LLM_ENDPOINTS)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"LLM_ENDPOINTS is not valid JSON: {e}") from None
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) and "base_url" in spec for spec in specs):
+        raise ValueError('LLM_ENDPOINTS must be a JSON list of objects, each with a "base_url"')
+    return tuple(specs)
+
+
+def _pool_models() -> Tuple[str, ...]:
+    """Models the async endpoint pool may answer with; an LLM_ENDPOINTS entry can override the model."""
+    return tuple(dict.fromkeys(spec.get("model", MODEL_NAME) for spec in _endpoint_specs())) or (MODEL_NAME,)
+
+
+def _from_cache(prompt: str, system_prompt: str, models: Tuple[str, ...],
+                semantic: Optional[Tuple[str, str]] = None) -> Tuple[Optional[str], Callable[[str, str], None]]:
+    """Look *prompt* up in the exact cache, then the semantic one, for each of *models*.
+
+    The semantic tier is consulted only when *semantic* is given as
+    ``(context, text)``: *text* is embedded and matches are restricted to
+    entries produced for the same *context* (e.g. the code under question).
+    Returns the cached response (or None) and a callback that records a
+    freshly generated response under the model that produced it in every
+    enabled tier.
+    """
+    for model in models:
+        response = _cache.get(cache_key(model, TEMPERATURE, system_prompt, prompt))
+        if response is not None:
+            return response, None
+
+    vector = None
+    if _semantic_cache is not None and semantic is not None:
+        context, text = semantic
+        context_key = cache_key(context)
+        vector = _semantic_cache.embed(text)
+        for model in models:
+            response = _semantic_cache.lookup(cache_key(model, TEMPERATURE, system_prompt, context_key), vector)
+            if response is not None:
+                return response, None
+
+    def store(fresh: str, model: str):
+        _cache.set(cache_key(model, TEMPERATURE, system_prompt, prompt), fresh)
+        if vector is not None:
+            _semantic_cache.add(cache_key(model, TEMPERATURE, system_prompt, context_key), vector, fresh)
+
+    return None, store
+
+
+def _json_object(response: str) -> dict:
+    """Parse *response* as the JSON object every prompt asks for, raising ValueError otherwise."""
+    parsed = json_loads(response)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"expected a JSON object, got {type(parsed).__name__}")
+    return parsed
+
+
+def _cached(models: Callable[[], Tuple[str, ...]], validate: Callable[[str], object] = _json_object):
+    """Serve repeated (system_prompt, prompt) pairs from the response caches.
+
+    The decorated function returns ``(response, model)``; cache entries are
+    keyed by that model, and lookups try each model returned by *models*
+    that could have answered. Responses that *validate* rejects (by raising)
+    are returned but not cached, so a malformed reply is regenerated on the
+    next run. The wrapper returns just the response and accepts an optional
+    ``semantic=(context, text)`` enabling the semantic tier for the call.
+    """
+    def keep(store: Callable[[str, str], None], response: str, model: str):
+        try:
+            validate(response)
+        except Exception:
+            return
+        store(response, model)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(prompt: str, system_prompt: str,
+                                    semantic: Optional[Tuple[str, str]] = None) -> str:
+                if LLM_CACHE_DISABLE:
+                    return (await func(prompt, system_prompt))[0]
+                response, store = _from_cache(prompt, system_prompt, models(), semantic)
+                if response is None:
+                    response, model = await func(prompt, system_prompt)
+                    keep(store, response, model)
+                return response
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(prompt: str, system_prompt: str, semantic: Optional[Tuple[str, str]] = None) -> str:
+            if LLM_CACHE_DISABLE:
+                return func(prompt, system_prompt)[0]
+            response, store = _from_cache(prompt, system_prompt, models(), semantic)
+            if response is None:
+                response, model = func(prompt, system_prompt)
+                keep(store, response, model)
+            return response
+        return wrapper
+    return decorator
+
+
+def _get_client():
+    """Return the shared OpenAI client, creating it on first use.
+
+    One instance keeps its HTTP connection alive between calls instead of
+    re-resolving module-level settings on each request.
+    """
+    global _client
+    if _client is None:
+        try:
+            import openai  # noqa: I900
+        except ImportError:  # pragma: no cover
+            raise RuntimeError("openai package not installed. Run `pip install openai`.")
+        _client = openai.OpenAI(api_key=API_KEY, base_url=_BASE_URL)
+    return _client
+
+
+def llm_completion(prompt: str, system_prompt: str, semantic: Optional[Tuple[str, str]] = None) -> str:
     """Call the configured LLM provider and return raw text."""
-    if openai is None:
-        raise RuntimeError("openai package not installed. Run `pip install openai`.")
-    response = openai.chat.completions.create(
+    return _complete(prompt, system_prompt, semantic=semantic)
+
+
+@_cached(lambda: (MODEL_NAME,))
+def _complete(prompt: str, system_prompt: str) -> Tuple[str, str]:
+    """Call the configured LLM provider, returning ``(text, model)`` for :func:`_cached`."""
+    response = _get_client().chat.completions.create(
         model=MODEL_NAME,
         messages=[{"role": "system", "content": system_prompt},
                   {"role": "user", "content": prompt}],
         temperature=TEMPERATURE,
         max_tokens=1024,
     )
-    return response.choices[0].message.content.strip()
+    return response.choices[0].message.content.strip(), MODEL_NAME
+
+
+def _get_pool():
+    """Return the endpoint pool, building it on first use."""
+    global _pool
+    if _pool is None:
+        from .client_pool import LLMClientPool
+        _pool = LLMClientPool.from_config(list(_endpoint_specs()), _BASE_URL, API_KEY, MODEL_NAME, LLM_CONCURRENCY)
+    return _pool
+
+
+async def llm_completion_async(prompt: str, system_prompt: str, semantic: Optional[Tuple[str, str]] = None) -> str:
+    """Async variant of :func:`llm_completion`, balanced over the configured endpoints."""
+    return await _complete_async(prompt, system_prompt, semantic=semantic)
+
+
+@_cached(_pool_models)
+async def _complete_async(prompt: str, system_prompt: str) -> Tuple[str, str]:
+    """Complete on the endpoint pool, returning ``(text, model)`` for :func:`_cached`."""
+    return await _get_pool().complete({
+        "messages": [{"role": "system", "content": system_prompt},
+                     {"role": "user", "content": prompt}],
+        "temperature": TEMPERATURE,
+        "max_tokens": 1024,
+    })
+
+
+async def aclose():
+    """Close the endpoint pool's HTTP clients; call before the event loop running a batch ends."""
+    if _pool is not None:
+        await _pool.aclose()
+
+
+async def llm_completion_many(prompts: List[str], system_prompt: str) -> List[str]:
+    """Complete several prompts concurrently over the shared connection pool."""
+    return await asyncio.gather(*(llm_completion_async(prompt, system_prompt) for prompt in prompts))
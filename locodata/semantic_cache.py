@@ -0,0 +1,91 @@
+"""Embedding-based second-tier cache for near-duplicate LLM prompts."""
+from __future__ import annotations
+
+import atexit
+import json
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import faiss  # noqa: I900
+    import numpy as np
+    from sentence_transformers import SentenceTransformer  # noqa: I900
+except ImportError:  # pragma: no cover
+    faiss = None
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEARCH_K = 8  # neighbours inspected per lookup, so other scopes cannot mask a hit
+
+
+class SemanticCache:
+    """Reuse a cached response when a new prompt embeds close to an earlier one.
+
+    Vectors live in a FAISS inner-product index over L2-normalised embeddings
+    (i.e. cosine similarity); ``entries`` holds the matching ``scope`` and
+    response at the same position. Both are written to disk at interpreter exit.
+    """
+
+    def __init__(self, index_path: Path, threshold: float = 0.95, model_name: str = EMBEDDING_MODEL):
+        self.index_path = index_path
+        self.meta_path = index_path.with_suffix(".jsonl")
+        self.threshold = threshold
+        self.model_name = model_name
+        self._model = None
+        self._index = None
+        self.entries: List[dict] = []
+        self._dirty = False
+
+    def _load(self):
+        """Load the embedding model and any persisted index on first use."""
+        if self._index is not None:
+            return
+        if faiss is None:
+            raise RuntimeError(
+                "Semantic cache requires faiss and sentence-transformers. "
+                "Run `pip install faiss-cpu sentence-transformers`."
+            )
+        self._model = SentenceTransformer(self.model_name)
+        if self.index_path.exists() and self.meta_path.exists():
+            self._index = faiss.read_index(str(self.index_path))
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.entries = [json.loads(line) for line in f]
+        else:
+            self._index = faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+        atexit.register(self.flush)
+
+    def embed(self, text: str) -> "np.ndarray":
+        """Return the normalised ``(1, dim)`` float32 embedding of *text*."""
+        self._load()
+        vector = self._model.encode([text], normalize_embeddings=True)
+        return np.asarray(vector, dtype="float32")
+
+    def lookup(self, scope: str, vector: "np.ndarray") -> Optional[str]:
+        """Return the closest cached response within *scope*, or None below the threshold."""
+        self._load()
+        if self._index.ntotal == 0:
+            return None
+        scores, ids = self._index.search(vector, min(SEARCH_K, self._index.ntotal))
+        for score, idx in zip(scores[0], ids[0]):
+            if score < self.threshold:
+                break
+            if idx >= 0 and self.entries[idx]["scope"] == scope:
+                return self.entries[idx]["response"]
+        return None
+
+    def add(self, scope: str, vector: "np.ndarray", response: str):
+        """Remember *response* for prompts embedding near *vector*."""
+        self._load()
+        self._index.add(vector)
+        self.entries.append({"scope": scope, "response": response})
+        self._dirty = True
+
+    def flush(self):
+        """Persist the index and its metadata sidecar if anything changed."""
+        if not self._dirty:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self._index, str(self.index_path))
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._dirty = False
@@ -2,237 +2,449 @@
 from __future__ import annotations
 
 import ast
-from itertools import islice
+import io
+import json
+import mmap
+import os
+import re
+import tokenize
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import accumulate, count, islice
+from operator import add
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
 from .config import REPO_PATH
 
+try:
+    import orjson  # noqa: I900
+except ImportError:  # pragma: no cover
+    orjson = None
+
 CHUNK_SIZE = 2000  # characters
 OVERLAP = 200      # characters
+PREFETCH_WINDOW = 32  # file reads in flight ahead of the consumer
+PROCESS_BATCH = 32    # files sent to a worker process per round trip
+MMAP_MIN_SIZE = 1 << 17  # bytes; smaller files are faster to read() than to map
+# Below this multiple of chunk_size the line chunker yields as good a split as the AST
+MIN_AST_CHUNK_RATIO = 1.5
+
+T = TypeVar("T")
+
+
+_LANGUAGE_MAP = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.jsx': 'javascript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.cs': 'csharp',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+    '.r': 'r',
+    '.m': 'matlab',
+    '.sh': 'bash',
+    '.sql': 'sql',
+    '.html': 'html',
+    '.css': 'css',
+    '.scss': 'scss',
+    '.sass': 'sass',
+    '.xml': 'xml',
+    '.json': 'json',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.toml': 'toml',
+    '.ini': 'ini',
+    '.cfg': 'ini',
+    '.conf': 'ini',
+    '.md': 'markdown',
+    '.txt': 'text',
+}
+
+# Start of an unindented def/class/async def, together with any decorators above it
+_TOP_DEF_RE = re.compile(r'^(?:@[^\n]*\n)*(?:async[ \t]+def|def|class)[ \t]+\w+', re.M)
+
+# Languages whose comments are // line and /* */ block comments
+_C_STYLE_LANGUAGES = frozenset({
+    'javascript', 'typescript', 'java', 'cpp', 'c', 'csharp', 'php',
+    'go', 'rust', 'swift', 'kotlin', 'scala',
+})
+# String literals are matched (and kept) so comment markers inside them survive
+_C_COMMENT_RE = re.compile(
+    r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`)'
+    r'|[ \t]*(?://[^\n]*|/\*.*?\*/)',
+    re.S,
+)
+_BLANK_RUN_RE = re.compile(r'\n[ \t]*\n(?:[ \t]*\n)+')
+_NEWLINE_RE = re.compile('\n')
+
+# Derived from the map so the walker and language detection cannot drift apart
+_CODE_EXTENSIONS = frozenset(_LANGUAGE_MAP)
+
+
+def json_loads(raw: str | bytes) -> Any:
+    """Parse JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize *obj* to JSON text with non-ASCII kept verbatim, using orjson when installed."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False)
 
 
 def detect_file_language(file_path: Path) -> str:
     """Detect programming language based on file extension."""
-    extension = file_path.suffix.lower()
-    
-    language_map = {
-        '.py': 'python',
-        '.js': 'javascript',
-        '.ts': 'typescript',
-        '.jsx': 'javascript',
-        '.tsx': 'typescript',
-        '.java': 'java',
-        '.cpp': 'cpp',
-        '.c': 'c',
-        '.cs': 'csharp',
-        '.php': 'php',
-        '.rb': 'ruby',
-        '.go': 'go',
-        '.rs': 'rust',
-        '.swift': 'swift',
-        '.kt': 'kotlin',
-        '.scala': 'scala',
-        '.r': 'r',
-        '.m': 'matlab',
-        '.sh': 'bash',
-        '.sql': 'sql',
-        '.html': 'html',
-        '.css': 'css',
-        '.scss': 'scss',
-        '.sass': 'sass',
-        '.xml': 'xml',
-        '.json': 'json',
-        '.yaml': 'yaml',
-        '.yml': 'yaml',
-        '.toml': 'toml',
-        '.ini': 'ini',
-        '.cfg': 'ini',
-        '.conf': 'ini',
-        '.md': 'markdown',
-        '.txt': 'text',
-    }
-    
-    return language_map.get(extension, 'unknown')
+    return _LANGUAGE_MAP.get(file_path.suffix.lower(), 'unknown')
+
+
+def read_source(path: Path, errors: str = 'strict') -> str:
+    """Read *path* as UTF-8 text with universal newlines, like ``Path.read_text`` but in one decode."""
+    with open(path, 'rb') as f:
+        # Large files decode straight from a memory map, without an extra bytes copy
+        if os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                code = str(mm, 'utf-8', errors)
+        else:
+            code = f.read().decode('utf-8', errors)
+    return _normalize_newlines(code)
+
+
+def _normalize_newlines(code: str) -> str:
+    """Rewrite ``\\r\\n`` and lone ``\\r`` line endings to ``\\n``; a no-op scan when there are none."""
+    if '\r' in code:
+        code = code.replace('\r\n', '\n').replace('\r', '\n')
+    return code
 
 
 def walk_code_files(root: Path = REPO_PATH) -> Iterable[Path]:
     """Yield all code files under *root* based on common programming language extensions."""
-    code_extensions = {
-        '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.cs', 
-        '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.r', '.m',
-        '.sh', '.sql', '.html', '.css', '.scss', '.sass', '.xml', '.json',
-        '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf', '.md', '.txt'
-    }
-    
-    for p in root.rglob("*"):
-        if p.is_file() and p.suffix.lower() in code_extensions:
-            yield p
+    # Walk with os.scandir so file type checks come from the directory listing
+    # and Path objects are only built for files that are yielded
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    name = entry.name
+                    dot = name.rfind('.')
+                    # dot > 0 matches Path.suffix, which ignores a leading dot
+                    if dot > 0 and name[dot:].lower() in _CODE_EXTENSIONS:
+                        yield Path(entry.path)
+
 
+def prefetch_files(files: Iterable[Path], read: Callable[[Path], T],
+                   window: int = PREFETCH_WINDOW) -> Iterator[Tuple[Path, Future[T]]]:
+    """Apply *read* to *files* on a thread pool, yielding ``(path, future)`` in input order.
+
+    File reads release the GIL, so they overlap with whatever the consumer does
+    with earlier files. At most *window* reads are outstanding at a time.
+    """
+    pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+    try:
+        pending = deque()
+        for path in files:
+            pending.append((path, pool.submit(read, path)))
+            if len(pending) >= window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+    finally:
+        # Don't finish reads nobody will consume if the caller stops early
+        pool.shutdown(cancel_futures=True)
 
-def chunk_code(code: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP) -> List[str]:
-    """Smart code chunking that respects code structure and creates meaningful chunks."""
+
+def chunk_repo_parallel(root: Path = REPO_PATH, workers: Optional[int] = None,
+                        files: Optional[Iterable[Path]] = None,
+                        strip_comments: bool = False) -> Iterator[Tuple[Path, List[str]]]:
+    """Read and chunk every code file under *root* (or *files*) in worker processes, yielding ``(path, chunks)``."""
+    if files is None:
+        files = walk_code_files(root)
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    try:
+        worker = partial(_chunk_file, strip_comments=strip_comments)
+        for path, chunks in pool.map(worker, files, chunksize=PROCESS_BATCH):
+            if isinstance(chunks, Exception):
+                print(f"Error chunking {path}: {chunks!r}")
+                continue
+            yield path, chunks
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _chunk_file(path: Path, strip_comments: bool = False) -> Tuple[Path, List[str] | Exception]:
+    """Worker for :func:`chunk_repo_parallel`; module-level so it can be pickled.
+
+    Any error is returned rather than raised, so one bad file does not abort
+    the whole map.
+    """
+    try:
+        return path, chunk_path(path, errors='ignore', strip_comments=strip_comments)
+    except Exception as e:
+        return path, e
+
+
+def chunk_path(path: Path, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP,
+               errors: str = 'strict', strip_comments: bool = False,
+               language: Optional[str] = None) -> List[str]:
+    """Read *path* with :func:`read_source` and chunk it like :func:`chunk_code`.
+
+    *language* defaults to the one detected from the file extension.
+    """
+    if language is None:
+        language = detect_file_language(path)
+    return chunk_code(read_source(path, errors), chunk_size, overlap,
+                      strip_comments=strip_comments, language=language)
+
+
+def chunk_code(code: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP,
+               strip_comments: bool = False, language: str = 'unknown') -> List[str]:
+    """Smart code chunking that respects code structure and creates meaningful chunks.
+
+    With *strip_comments*, comments and runs of blank lines are removed first
+    for Python and C-style *language* values; other languages are left as is.
+    """
+    if strip_comments:
+        code = _strip_trivia(code, language)
+    return [chunk for chunk, _, _ in _chunk_spans(code, chunk_size, overlap)]
+
+
+def chunk_code_with_lines(code: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP) -> List[Tuple[str, int, int]]:
+    """Chunk *code* like :func:`chunk_code`, pairing each chunk with its 1-based start and end line."""
+    code = _normalize_newlines(code)
+    newlines = [m.start() for m in _NEWLINE_RE.finditer(code)]
+    # The line of offset i is one more than the number of newlines before it
+    return [
+        (chunk, bisect_left(newlines, start) + 1, bisect_left(newlines, max(start, end - 1)) + 1)
+        for chunk, start, end in _chunk_spans(code, chunk_size, overlap)
+    ]
+
+
+def _chunk_spans(code: str, chunk_size: int, overlap: int) -> List[Tuple[str, int, int]]:
+    """Chunk *code*, returning ``(chunk, start, end)`` with the source offsets each chunk covers."""
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(f"overlap must be in [0, chunk_size), got overlap={overlap}, chunk_size={chunk_size}")
+    # Every strategy splits on '\n'; a lone '\r' would desync the AST line table
+    code = _normalize_newlines(code)
     if len(code) <= chunk_size:
-        return [code]
-    
-    # Strategy 1: Try to chunk by complete functions/classes (for Python)
-    if 'def ' in code or 'class ' in code:
-        chunks = _chunk_by_functions(code, chunk_size, overlap)
-        if chunks and all(len(chunk) <= chunk_size for chunk in chunks):
-            return chunks
-    
-    # Strategy 2: Try to chunk by complete statements/blocks
-    chunks = _chunk_by_statements(code, chunk_size, overlap)
-    if chunks and all(len(chunk) <= chunk_size for chunk in chunks):
-        return chunks
+        return [(code, 0, len(code))]
     
-    # Strategy 3: Try to chunk by lines (respecting line boundaries)
-    chunks = _chunk_by_lines(code, chunk_size, overlap)
-    if chunks and all(len(chunk) <= chunk_size for chunk in chunks):
-        return chunks
+    # Strategy 1: Try to chunk by complete functions/classes (for Python);
+    # only worth it when the file is big enough and has units to split on
+    if len(code) >= chunk_size * MIN_AST_CHUNK_RATIO:
+        starts = [m.start() for m in _TOP_DEF_RE.finditer(code)]
+        if len(starts) >= 2:
+            # _chunk_units returns [] rather than a chunk over chunk_size; only
+            # parse when a slice dragged module-level code past the limit
+            chunks = (_chunk_units(code, _def_offset_ranges(code, starts), chunk_size, overlap)
+                      or _chunk_units(code, _top_level_ranges(code), chunk_size, overlap))
+            if chunks:
+                return chunks
     
-    # Fallback: Original naive chunking
-    return _naive_chunk(code, chunk_size, overlap)
+    # Strategy 2: Chunk by complete lines; never exceeds chunk_size
+    return _chunk_by_lines(code, chunk_size, overlap)
+
+
+def _strip_trivia(code: str, language: str) -> str:
+    """Remove comments and collapse blank-line runs in *code*; unknown languages pass through."""
+    if language == 'python':
+        return _strip_python_trivia(code)
+    if language in _C_STYLE_LANGUAGES:
+        code = _C_COMMENT_RE.sub(lambda m: m.group(1) or '', code)
+        return _BLANK_RUN_RE.sub('\n\n', code)
+    return code
 
 
-def _chunk_by_functions(code: str, chunk_size: int, overlap: int) -> List[str]:
-    """Chunk code by complete functions and classes."""
+def _strip_python_trivia(code: str) -> str:
+    """Drop comments and repeated blank lines using tokenize, so strings are never touched."""
+    lines = code.split('\n')
+    drop = set()
+    blank = set()
     try:
-        tree = ast.parse(code)
-        chunks = []
-        current_chunk = ""
-        
-        # Collect all function and class definitions
-        code_units = []
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                unit_code = ast.unparse(node)
-                # If a single unit is too large, skip function-based chunking
-                if len(unit_code) > chunk_size:
-                    return []
-                code_units.append(unit_code)
-        
-        # If no functions/classes found, return empty to try other strategies
-        if not code_units:
-            return []
-        
-        # Build chunks from code units
-        for unit in code_units:
-            # If adding this unit would exceed chunk size and we have content
-            if len(current_chunk) + len(unit) > chunk_size and current_chunk:
-                chunks.append(current_chunk.strip())
-                # Start new chunk with overlap
-                if overlap > 0:
-                    overlap_text = current_chunk[-overlap:] if len(current_chunk) > overlap else current_chunk
-                    current_chunk = overlap_text + "\n\n" + unit
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            row, col = tok.start
+            if tok.type == tokenize.COMMENT:
+                line = lines[row - 1]
+                if line[:col].strip():
+                    lines[row - 1] = line[:col].rstrip()
                 else:
-                    current_chunk = unit
-            else:
-                current_chunk += "\n\n" + unit if current_chunk else unit
-        
-        # Add the last chunk
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
-        return chunks if chunks else []
-    except SyntaxError:
-        # If AST parsing fails, fall back to statement-based chunking
-        return []
+                    drop.add(row)
+            elif tok.type == tokenize.NL and not tok.line.strip():
+                blank.add(row)
+    except (tokenize.TokenError, SyntaxError):
+        # Leave code tokenize cannot handle exactly as it was
+        return code
+    
+    # NL tokens only mark blank lines outside strings, so string contents stay intact
+    kept = []
+    previous_blank = False
+    for row, line in enumerate(lines, 1):
+        if row in drop or (row in blank and previous_blank):
+            continue
+        previous_blank = row in blank
+        kept.append(line)
+    return '\n'.join(kept)
 
 
-def _chunk_by_statements(code: str, chunk_size: int, overlap: int) -> List[str]:
-    """Chunk code by complete statements, respecting indentation and logical blocks."""
-    lines = code.split('\n')
-    chunks = []
-    current_chunk = []
-    current_size = 0
+def _top_level_ranges(code: str) -> Tuple[Tuple[int, int], ...]:
+    """Character ranges of top-level functions and classes; empty if *code* does not parse.
+
+    The tree is dropped as soon as the ranges are read, so large ASTs never
+    outlive the call.
+    """
+    try:
+        # What ast.parse does, minus its wrapper; type comments stay off
+        tree = compile(code, '<chunk>', 'exec', ast.PyCF_ONLY_AST)
+    except (SyntaxError, ValueError, MemoryError, RecursionError):
+        # Deeply nested input can exhaust the parser; fall back to line chunking
+        return ()
+    # Line k starts at (lengths of the lines before it) + k newlines
+    line_starts = list(map(add, accumulate(map(len, code.split('\n')), initial=0), count()))
+    # Nested definitions are already inside their enclosing unit
+    return tuple(
+        (line_starts[(node.decorator_list[0].lineno if node.decorator_list else node.lineno) - 1],
+         line_starts[node.end_lineno] - 1)
+        for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    )
+
+
+def _def_offset_ranges(code: str, starts: List[int]) -> Iterator[Tuple[int, int]]:
+    """Ranges between consecutive top-level definition offsets found by _TOP_DEF_RE.
+
+    Each range runs from one definition to the next, so module-level code
+    between them stays attached to the definition above it.
+    """
+    bounds = [0, *starts] if starts[0] else starts
+    return zip(bounds, [*bounds[1:], len(code)])
+
+
+def _chunk_units(code: str, ranges: Iterable[Tuple[int, int]], chunk_size: int, overlap: int) -> List[Tuple[str, int, int]]:
+    """Greedily pack the ``code[start:end]`` units of *ranges* into ``(chunk, start, end)`` chunks, or [] if one is too long."""
+    code_units = []
+    for start, end in ranges:
+        end = start + len(code[start:end].rstrip())
+        if end - start > chunk_size:
+            return []
+        if end > start:
+            code_units.append((start, end))
     
-    for line in lines:
-        line_size = len(line) + 1  # +1 for newline
-        
-        # If adding this line would exceed chunk size and we have content
-        if current_size + line_size > chunk_size and current_chunk:
-            # Complete the current chunk
-            chunk_text = '\n'.join(current_chunk)
-            chunks.append(chunk_text)
-            
+    chunks = []
+    # Build chunks from source ranges, joining each chunk's text once when it
+    # is flushed rather than re-copying the accumulated text on every unit
+    current_parts: List[Tuple[int, int]] = []
+    current_len = 0
+    for start, end in code_units:
+        unit_len = end - start
+        # If adding this unit would exceed chunk size and we have content
+        if current_len + unit_len > chunk_size and current_parts:
+            chunk = _join_parts(code, current_parts)
+            if chunk is not None:
+                if len(chunk[0]) > chunk_size:
+                    return []
+                chunks.append(chunk)
             # Start new chunk with overlap
             if overlap > 0:
-                overlap_lines = []
-                overlap_size = 0
-                for overlap_line in reversed(current_chunk):
-                    if overlap_size + len(overlap_line) + 1 <= overlap:
-                        overlap_lines.insert(0, overlap_line)
-                        overlap_size += len(overlap_line) + 1
-                    else:
-                        break
-                current_chunk = overlap_lines
-                current_size = overlap_size
+                last_end = current_parts[-1][1]
+                overlap_start = max(current_parts[0][0], last_end - overlap)
+                current_parts = [(overlap_start, last_end), (start, end)]
+                current_len = last_end - overlap_start + 2 + unit_len
             else:
-                current_chunk = []
-                current_size = 0
-        
-        current_chunk.append(line)
-        current_size += line_size
+                current_parts = [(start, end)]
+                current_len = unit_len
+        else:
+            current_len += unit_len + 2 if current_parts else unit_len
+            current_parts.append((start, end))
     
     # Add the last chunk
-    if current_chunk:
-        chunk_text = '\n'.join(current_chunk)
-        chunks.append(chunk_text)
+    chunk = _join_parts(code, current_parts)
+    if chunk is not None:
+        if len(chunk[0]) > chunk_size:
+            return []
+        chunks.append(chunk)
     
     return chunks
 
 
-def _chunk_by_lines(code: str, chunk_size: int, overlap: int) -> List[str]:
-    """Chunk code by complete lines, ensuring we don't break in the middle of lines."""
-    lines = code.split('\n')
+def _join_parts(code: str, parts: List[Tuple[int, int]]) -> Optional[Tuple[str, int, int]]:
+    """Join source ranges with blank lines into a stripped ``(chunk, start, end)``, or None if blank."""
+    text = "\n\n".join([code[start:end] for start, end in parts]).strip()
+    if not text:
+        return None
+    # Units are already right-stripped; skip leading whitespace for the start offset
+    for start, end in parts:
+        part = code[start:end]
+        stripped = part.lstrip()
+        if stripped:
+            return text, start + len(part) - len(stripped), parts[-1][1]
+    return None
+
+
+def _chunk_by_lines(code: str, chunk_size: int, overlap: int) -> List[Tuple[str, int, int]]:
+    """Chunk code by complete lines in one pass; lines longer than chunk_size are split naively."""
     chunks = []
-    current_chunk = []
-    current_size = 0
+    n = len(code)
+    # start: first character of the chunk being built (overlap included)
+    # pos: first character of the first line not yet emitted
+    start = pos = 0
     
-    for line in lines:
-        line_size = len(line) + 1  # +1 for newline
+    while True:
+        line_end = code.find('\n', pos)
+        if line_end < 0:
+            line_end = n
         
-        # If adding this line would exceed chunk size
-        if current_size + line_size > chunk_size and current_chunk:
-            # Complete the current chunk
-            chunk_text = '\n'.join(current_chunk)
-            chunks.append(chunk_text)
-            
-            # Start new chunk with overlap
-            if overlap > 0:
-                overlap_lines = []
-                overlap_size = 0
-                for overlap_line in reversed(current_chunk):
-                    if overlap_size + len(overlap_line) + 1 <= overlap:
-                        overlap_lines.insert(0, overlap_line)
-                        overlap_size += len(overlap_line) + 1
-                    else:
-                        break
-                current_chunk = overlap_lines
-                current_size = overlap_size
-            else:
-                current_chunk = []
-                current_size = 0
+        # A single line that cannot fit any chunk is split on its own
+        if line_end - pos > chunk_size:
+            chunks.extend(_naive_chunk(code, pos, line_end, chunk_size, overlap))
+            if line_end == n:
+                break
+            start = pos = line_end + 1
+            continue
         
-        current_chunk.append(line)
-        current_size += line_size
-    
-    # Add the last chunk
-    if current_chunk:
-        chunk_text = '\n'.join(current_chunk)
-        chunks.append(chunk_text)
+        # Drop the overlap if it would push this line past chunk_size
+        if line_end - start > chunk_size:
+            start = pos
+        
+        # End on the last newline that keeps the chunk (plus newline) within
+        # chunk_size, but always take at least the first new line
+        if n < start + chunk_size:
+            end = n
+        else:
+            end = max(code.rfind('\n', start, start + chunk_size), line_end)
+        chunks.append((code[start:end], start, end))
+        if end == n:
+            break
+        
+        # Start the next chunk with the trailing whole lines that fit in overlap
+        pos = end + 1
+        if pos - overlap > start:
+            start = code.find('\n', pos - overlap - 1, pos) + 1
     
     return chunks
 
 
-def _naive_chunk(code: str, chunk_size: int, overlap: int) -> List[str]:
-    """Original naive chunking as fallback."""
-    chunks = []
-    i = 0
-    while i < len(code):
-        chunk = code[i : i + chunk_size]
-        chunks.append(chunk)
-        i += chunk_size - overlap
-    return chunks
-
+def _naive_chunk(code: str, start: int, end: int, chunk_size: int, overlap: int) -> List[Tuple[str, int, int]]:
+    """Original naive chunking of ``code[start:end]`` as fallback; chunk_code guarantees a positive stride."""
+    stride = chunk_size - overlap
+    return [(code[i:min(i + chunk_size, end)], i, min(i + chunk_size, end)) for i in range(start, end, stride)]
@@ -0,0 +1,111 @@
+"""Tests for the chunkers in locodata.utils."""
+import random
+
+import pytest
+
+from locodata import utils
+
+
+def _baseline_chunk_by_lines(code, chunk_size, overlap):
+    """The original list-of-lines chunker, kept as the reference for the single-pass one."""
+    lines = code.split('\n')
+    chunks = []
+    current_chunk = []
+    current_size = 0
+
+    for line in lines:
+        line_size = len(line) + 1
+        if current_size + line_size > chunk_size and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            if overlap > 0:
+                overlap_lines = []
+                overlap_size = 0
+                for overlap_line in reversed(current_chunk):
+                    if overlap_size + len(overlap_line) + 1 <= overlap:
+                        overlap_lines.insert(0, overlap_line)
+                        overlap_size += len(overlap_line) + 1
+                    else:
+                        break
+                current_chunk = overlap_lines
+                current_size = overlap_size
+            else:
+                current_chunk = []
+                current_size = 0
+        current_chunk.append(line)
+        current_size += line_size
+
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+    return chunks
+
+
+def _random_text(rng, max_width):
+    """Lines of random length, up to *max_width* characters."""
+    lines = []
+    for _ in range(rng.randint(1, 200)):
+        width = rng.choice((0, rng.randint(1, 80), rng.randint(1, max_width)))
+        lines.append('x' * width)
+    return '\n'.join(lines) + rng.choice(('', '\n'))
+
+
+def _random_python(rng):
+    """A module of top-level functions and classes with some module-level code between them."""
+    parts = []
+    for i in range(rng.randint(2, 60)):
+        body = '\n'.join(f"    v{j} = {j} * {'y' * rng.randint(0, 60)}" for j in range(rng.randint(1, 30)))
+        kind = rng.choice(('def f{}():', 'async def g{}():', 'class C{}:', '@decorator\ndef d{}():'))
+        parts.append(kind.format(i) + '\n' + body + '\n')
+        if rng.random() < 0.3:
+            parts.append(f"CONST_{i} = {i}\n")
+    return '\n'.join(parts)
+
+
+CASES = [(seed, chunk_size, overlap)
+         for seed in range(40)
+         for chunk_size, overlap in ((200, 0), (200, 50), (500, 200), (2000, 200))]
+
+
+@pytest.mark.parametrize("seed,chunk_size,overlap", CASES)
+def test_line_chunker_matches_baseline_where_baseline_was_valid(seed, chunk_size, overlap):
+    code = _random_text(random.Random(seed), chunk_size - overlap)
+    expected = _baseline_chunk_by_lines(code, chunk_size, overlap)
+    if any(len(chunk) > chunk_size for chunk in expected):
+        pytest.skip("baseline produced an oversized chunk and fell back to naive chunking")
+    assert [chunk for chunk, _, _ in utils._chunk_by_lines(code, chunk_size, overlap)] == expected
+
+
+@pytest.mark.parametrize("seed,chunk_size,overlap", CASES)
+def test_no_chunk_exceeds_chunk_size(seed, chunk_size, overlap):
+    rng = random.Random(seed)
+    # Some lines longer than chunk_size, which have to be split mid-line
+    for code in (_random_text(rng, chunk_size + chunk_size // 4), _random_python(rng)):
+        chunks = utils.chunk_code(code, chunk_size, overlap)
+        assert chunks
+        assert all(len(chunk) <= chunk_size for chunk in chunks)
+
+
+@pytest.mark.parametrize("seed,chunk_size,overlap", CASES)
+def test_line_ranges_cover_each_chunk(seed, chunk_size, overlap):
+    rng = random.Random(seed)
+    for code in (_random_text(rng, chunk_size + chunk_size // 4), _random_python(rng)):
+        lines = code.split('\n')
+        for chunk, start_line, end_line in utils.chunk_code_with_lines(code, chunk_size, overlap):
+            assert 1 <= start_line <= end_line <= len(lines)
+            # Definition chunks join their units with blank lines, so compare line by line
+            covered = lines[start_line - 1:end_line]
+            chunk_lines = chunk.split('\n')
+            assert chunk_lines[0] in covered[0]
+            assert chunk_lines[-1] in covered[-1]
+            assert all(any(line in source for source in covered) for line in chunk_lines)
+
+
+def test_cr_line_endings_are_normalized():
+    code = _random_python(random.Random(0))
+    expected = utils.chunk_code_with_lines(code, 500, 100)
+    assert utils.chunk_code_with_lines(code.replace('\n', '\r'), 500, 100) == expected
+    assert utils.chunk_code_with_lines(code.replace('\n', '\r\n'), 500, 100) == expected
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        utils.chunk_code('x\n' * 100, chunk_size=50, overlap=50)
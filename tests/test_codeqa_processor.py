@@ -0,0 +1,53 @@
+"""Tests for resuming CodeQA batches from their JSONL output."""
+import json
+
+from locodata import codeqa_processor
+from locodata.codeqa_processor import CodeQADatasetProcessor
+
+
+def _write_split(root, rows):
+    """Write a CodeQA split of (code, question, answer) rows under *root*/python/test."""
+    data_dir = root / "python" / "test"
+    data_dir.mkdir(parents=True)
+    for suffix, column in (("code", 0), ("question", 1), ("answer", 2)):
+        (data_dir / f"test.{suffix}").write_text("".join(row[column] + "\n" for row in rows), encoding="utf-8")
+    return data_dir
+
+
+def test_process_qa_resumes_and_retries_failed_rows(tmp_path, monkeypatch):
+    data_dir = _write_split(tmp_path / "data", [(f"x = {i}", f"q{i}", f"a{i}") for i in range(1, 5)])
+    monkeypatch.setattr(codeqa_processor, "ARTIFACTS_DIR", tmp_path / "artifacts")
+    asked = []
+    failing = {"q2"}
+
+    async def fake_completion(payload, system_prompt, semantic=None):
+        code, question = semantic
+        asked.append(question)
+        if question in failing:
+            return "not json"
+        return json.dumps({"answer": f"answer to {question}", "reasoning": code})
+
+    monkeypatch.setattr(codeqa_processor.llm, "llm_completion_async", fake_completion)
+    processor = CodeQADatasetProcessor(data_dir)
+
+    # First run stops after three rows, one of which fails to parse
+    assert processor.process_qa(limit=3) == 3
+    assert sorted(asked) == ["q1", "q2", "q3"]
+
+    # The rerun retries the failed row and picks up the unread one, nothing else
+    asked.clear()
+    failing.clear()
+    assert processor.process_qa(limit=0) == 2
+    assert sorted(asked) == ["q2", "q4"]
+
+    output = tmp_path / "artifacts" / "codeqa_python_test_results.jsonl"
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == 5
+    assert sum("error" in record for record in records) == 1
+    answered = {record["line_num"]: record["generated_answer"] for record in records if "error" not in record}
+    assert answered == {i: f"answer to q{i}" for i in range(1, 5)}
+
+    # Nothing is left to do once every row has a clean result
+    asked.clear()
+    assert processor.process_qa(limit=0) == 0
+    assert asked == []
@@ -0,0 +1,32 @@
+"""Tests for technology-stack detection in locodata.design_processor."""
+import random
+
+import pytest
+
+from locodata.design_processor import DB_INDICATORS, FRAMEWORK_INDICATORS, _IndicatorMatcher
+
+
+def _brute_force(indicators, paths):
+    """The original detection: test every indicator against every path."""
+    return [name for name, words in indicators.items()
+            if any(word in path for word in words for path in paths)]
+
+
+def _random_paths(rng, indicators):
+    """Lowercased paths built from indicator fragments, prefixes of them and filler."""
+    words = [word for group in indicators.values() for word in group]
+    pieces = words + [word[:rng.randint(1, len(word))] for word in words] + ['src', 'lib', '/', '.', '_']
+    return [''.join(rng.choice(pieces) for _ in range(rng.randint(1, 6))).lower()
+            for _ in range(rng.randint(0, 20))]
+
+
+@pytest.mark.parametrize("indicators", [FRAMEWORK_INDICATORS, DB_INDICATORS])
+@pytest.mark.parametrize("seed", range(200))
+def test_matcher_agrees_with_brute_force(indicators, seed):
+    paths = _random_paths(random.Random(seed), indicators)
+    assert _IndicatorMatcher(indicators).detect(paths) == _brute_force(indicators, paths)
+
+
+def test_overlapping_indicators_are_all_reported():
+    assert _IndicatorMatcher(DB_INDICATORS).detect(['app/pymongo_store.py']) == ['MongoDB']
+    assert _IndicatorMatcher({'A': ['ab'], 'B': ['abc'], 'C': ['bc']}).detect(['xabcx']) == ['A', 'B', 'C']